@@ -0,0 +1,248 @@
+import argparse
+import time
+import numpy as np
+import tensorflow as tf
+from sklearn.model_selection import train_test_split
+from enhanced_training import load_dataset_with_metadata, METADATA_COLUMNS, LABEL_COLUMNS
+from pose_postprocessing import missing_frame_mask, prepare_sequence
+
+# Model paths
+GATE_MODEL_PATH = 'models/swing_gate.tflite'
+FULL_MODEL_PATH = 'models/enhanced_swing_analyzer.tflite'
+
+# Error categories (same order as the full model outputs)
+error_types = ['good swing', 'over-the-top', 'early extension', 'casting']
+
+def summarize_keypoints(keypoints):
+    """Cheap per-swing summary: mean, std and range of every keypoint column."""
+    keypoints = np.asarray(keypoints, dtype=np.float32)
+    # Leave padding and undetected frames out of the statistics
+    detected = keypoints[~missing_frame_mask(keypoints)]
+    if len(detected):
+        keypoints = detected
+    return np.concatenate([
+        keypoints.mean(axis=0),
+        keypoints.std(axis=0),
+        np.ptp(keypoints, axis=0)
+    ])
+
+def gate_features(keypoints, metadata_features):
+    """Build the first-stage input from a normalized sequence and its metadata."""
+    return np.concatenate([
+        summarize_keypoints(keypoints),
+        np.asarray(metadata_features, dtype=np.float32)
+    ]).astype(np.float32)
+
+def build_gate_model(train_features):
+    """Build a tiny dense model scoring how likely a swing is clean."""
+    normalizer = tf.keras.layers.Normalization()
+    normalizer.adapt(train_features)
+
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(train_features.shape[1],)),
+        normalizer,
+        tf.keras.layers.Dense(16, activation='relu'),
+        tf.keras.layers.Dense(1, activation='sigmoid')
+    ])
+
+    model.compile(
+        optimizer='adam',
+        loss='binary_crossentropy',
+        metrics=['accuracy']
+    )
+    return model
+
+def prepare_arrays(dataset):
+    """Return pose, metadata and label arrays in the order used by the full model."""
+    X_pose = np.array([np.array(k) for k in dataset['keypoints']], dtype=np.float32)
+    X_metadata = dataset[METADATA_COLUMNS].values.astype(np.float32)
+    y = dataset[LABEL_COLUMNS].values
+    return X_pose, X_metadata, y
+
+def train_gate_model(dataset=None):
+    """Train the first-stage gate on the same split as the full model and export it."""
+    if dataset is None:
+        dataset = load_dataset_with_metadata()
+    X_pose, X_metadata, y = prepare_arrays(dataset)
+    X_gate = np.array([gate_features(p, m) for p, m in zip(X_pose, X_metadata)])
+
+    # Same split as train_enhanced_model so the test set stays held out
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_gate, y[:, 0], test_size=0.2, random_state=42
+    )
+
+    model = build_gate_model(X_train)
+    model.fit(
+        X_train, y_train,
+        epochs=50,
+        batch_size=16,
+        validation_data=(X_test, y_test),
+        callbacks=[
+            tf.keras.callbacks.EarlyStopping(patience=5, restore_best_weights=True)
+        ]
+    )
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    tflite_model = converter.convert()
+
+    with open(GATE_MODEL_PATH, 'wb') as f:
+        f.write(tflite_model)
+
+    print(f"Gate model trained and exported to {GATE_MODEL_PATH}")
+    return model
+
+class CascadeSwingAnalyzer:
+    """Score swings with a tiny gate model, falling back to the full classifier.
+
+    Swings the gate scores as good with probability >= good_threshold exit
+    early; everything else runs through enhanced_swing_analyzer.tflite.
+    Results always carry every category in all_scores; on an early exit the
+    categories the gate doesn't score are None.
+    """
+
+    def __init__(self, gate_model_path=GATE_MODEL_PATH, full_model_path=FULL_MODEL_PATH,
+                 good_threshold=0.9):
+        self.good_threshold = good_threshold
+
+        self.gate = tf.lite.Interpreter(model_path=gate_model_path)
+        self.gate.allocate_tensors()
+        self.gate_input = self.gate.get_input_details()[0]['index']
+        self.gate_output = self.gate.get_output_details()[0]['index']
+
+        self.full = tf.lite.Interpreter(model_path=full_model_path)
+        self.full.allocate_tensors()
+        self.full_output = self.full.get_output_details()[0]['index']
+        for detail in self.full.get_input_details():
+            # Converted input names look like 'serving_default_pose_input:0'
+            if 'pose_input' in detail['name'] or len(detail['shape']) == 3:
+                self.pose_input = detail['index']
+            else:
+                self.metadata_input = detail['index']
+
+        self.swings_scored = 0
+        self.early_exits = 0
+
+    @property
+    def exit_rate(self):
+        """Fraction of scored swings decided by the gate alone."""
+        return self.early_exits / self.swings_scored if self.swings_scored else 0.0
+
+    def gate_score(self, keypoints, metadata_features):
+        """Probability from the gate model that the swing is good."""
+        features = gate_features(keypoints, metadata_features)
+        self.gate.set_tensor(self.gate_input, features[np.newaxis])
+        self.gate.invoke()
+        return float(self.gate.get_tensor(self.gate_output)[0][0])
+
+    def full_scores(self, keypoints, metadata_features):
+        """Per-category scores from the full multi-input classifier."""
+        self.full.set_tensor(self.pose_input,
+                             np.asarray(keypoints, dtype=np.float32)[np.newaxis])
+        self.full.set_tensor(self.metadata_input,
+                             np.asarray(metadata_features, dtype=np.float32)[np.newaxis])
+        self.full.invoke()
+        return self.full.get_tensor(self.full_output)[0]
+
+    def analyze(self, keypoints, metadata_features):
+        """Analyze one swing, running the full model only when the gate is unsure."""
+        keypoints = prepare_sequence(keypoints)
+        self.swings_scored += 1
+
+        p_good = self.gate_score(keypoints, metadata_features)
+        if p_good >= self.good_threshold:
+            self.early_exits += 1
+            return {
+                'detected_error': error_types[0],
+                'confidence': p_good,
+                'all_scores': {error_type: p_good if i == 0 else None
+                               for i, error_type in enumerate(error_types)},
+                'stage': 'gate',
+                'gate_confidence': p_good
+            }
+
+        output = self.full_scores(keypoints, metadata_features)
+        max_idx = int(np.argmax(output))
+        return {
+            'detected_error': error_types[max_idx],
+            'confidence': float(output[max_idx]),
+            'all_scores': {error_types[i]: float(output[i]) for i in range(len(error_types))},
+            'stage': 'full',
+            'gate_confidence': p_good
+        }
+
+def evaluate_cascade(analyzer, thresholds, dataset=None):
+    """Report exit rate, accuracy impact and relative cost for each gate threshold."""
+    if dataset is None:
+        dataset = load_dataset_with_metadata()
+    if len(dataset) < 2:
+        print("Not enough swings to build a held-out split, nothing to evaluate")
+        return []
+    X_pose, X_metadata, y = prepare_arrays(dataset)
+    _, X_pose_test, _, X_metadata_test, _, y_test = train_test_split(
+        X_pose, X_metadata, y, test_size=0.2, random_state=42
+    )
+    if not len(y_test):
+        print("Held-out split is empty, nothing to evaluate")
+        return []
+    true_idx = np.argmax(y_test, axis=1)
+
+    # Run both stages on every held-out swing once, then replay the cascade per threshold
+    gate_probs, full_idx = [], []
+    gate_time = full_time = 0.0
+    for pose, meta in zip(X_pose_test, X_metadata_test):
+        start = time.perf_counter()
+        gate_probs.append(analyzer.gate_score(pose, meta))
+        gate_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        full_idx.append(int(np.argmax(analyzer.full_scores(pose, meta))))
+        full_time += time.perf_counter() - start
+    gate_probs = np.array(gate_probs)
+    full_idx = np.array(full_idx)
+
+    full_accuracy = float(np.mean(full_idx == true_idx))
+    reports = []
+    for threshold in thresholds:
+        exits = gate_probs >= threshold
+        cascade_idx = np.where(exits, 0, full_idx)
+        exit_rate = float(np.mean(exits))
+        reports.append({
+            'threshold': threshold,
+            'exit_rate': exit_rate,
+            'full_accuracy': full_accuracy,
+            'cascade_accuracy': float(np.mean(cascade_idx == true_idx)),
+            'exit_precision': float(np.mean(true_idx[exits] == 0)) if exits.any() else None,
+            'relative_cost': ((gate_time + (1.0 - exit_rate) * full_time) / full_time
+                              if full_time > 0 else None)
+        })
+    return reports
+
+def main():
+    parser = argparse.ArgumentParser(description='Cascaded early-exit swing scoring')
+    parser.add_argument('--train-gate', action='store_true', help='Train and export the gate model')
+    parser.add_argument('--evaluate', action='store_true',
+                        help='Report exit rate and accuracy impact on the held-out split')
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.8, 0.9, 0.95],
+                        help='Gate confidence thresholds to evaluate')
+    args = parser.parse_args()
+
+    if args.train_gate:
+        train_gate_model()
+
+    if args.evaluate:
+        analyzer = CascadeSwingAnalyzer()
+        for report in evaluate_cascade(analyzer, args.thresholds):
+            precision = report['exit_precision']
+            cost = report['relative_cost']
+            print(f"threshold {report['threshold']:.2f}: "
+                  f"exit rate {report['exit_rate']:.1%}, "
+                  f"accuracy {report['cascade_accuracy']:.3f} "
+                  f"(full model {report['full_accuracy']:.3f}), "
+                  f"exit precision {'n/a' if precision is None else f'{precision:.3f}'}, "
+                  f"cost {'n/a' if cost is None else f'{cost:.2f}x'} of full model")
+
+    if not (args.train_gate or args.evaluate):
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
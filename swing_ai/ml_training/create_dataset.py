@@ -1,23 +1,12 @@
 import os
 import pandas as pd
-import numpy as np
 import glob
+from pose_postprocessing import prepare_sequence
 
 # Directories
 KEYPOINTS_DIR = 'data/processed_keypoints'
 OUTPUT_FILE = 'data/swing_dataset.csv'
 
-def normalize_sequence_length(keypoints, target_length=60):
-    """Normalize all sequences to the same length."""
-    if len(keypoints) > target_length:
-        # Take frames focusing on the critical part of the swing
-        start_idx = max(0, len(keypoints) // 2 - target_length // 2)
-        return keypoints[start_idx:start_idx + target_length]
-    else:
-        # Pad with zeros if too short
-        padding = np.zeros((target_length - len(keypoints), keypoints.shape[1]))
-        return np.vstack([keypoints, padding])
-
 # Create dataset
 all_data = []
 for category in ['good', 'over_the_top', 'early_extension', 'casting']:
@@ -28,8 +17,8 @@ for category in ['good', 'over_the_top', 'early_extension', 'casting']:
         df = pd.read_csv(csv_file)
         keypoints = df.values
         
-        # Normalize sequence length
-        keypoints = normalize_sequence_length(keypoints)
+        # Fill short detection gaps and normalize sequence length
+        keypoints = prepare_sequence(keypoints)
         
         # Create record with label
         record = {
@@ -4,6 +4,8 @@ from golfer_metadata import GolferMetadata
 from recording_protocol import setup_recording
 from enhanced_data_collector import EnhancedDataCollector
 
+ANGLES = ['face-on', 'down-the-line']
+
 def main():
     parser = argparse.ArgumentParser(description='Golf Swing Data Collector')
     parser.add_argument('--setup', action='store_true', help='Run camera setup guide')
@@ -11,14 +13,29 @@ def main():
     parser.add_argument('--record', action='store_true', help='Record a new swing')
     parser.add_argument('--golfer-id', type=str, help='Existing golfer ID')
     parser.add_argument('--club', type=str, help='Club type (e.g., driver, 7-iron)')
-    parser.add_argument('--angle', type=str, choices=['face-on', 'down-the-line'], 
+    parser.add_argument('--angle', type=str, choices=ANGLES, 
                         default='face-on', help='Camera angle')
     parser.add_argument('--category', type=str, 
                         choices=['good', 'over-the-top', 'early-extension', 'casting'],
                         help='Swing error category')
+    parser.add_argument('--sources', type=str, nargs='+', metavar='ANGLE=SOURCE',
+                        help='Record several views at once, e.g. face-on=0 down-the-line=1 '
+                             '(SOURCE is a camera index or video path)')
     
     args = parser.parse_args()
     
+    # Validate multi-view sources up front so typos don't reach the metadata
+    sources = {}
+    for entry in args.sources or []:
+        angle, sep, source = entry.partition('=')
+        if not sep or not source:
+            parser.error(f"--sources entry {entry!r} must look like ANGLE=SOURCE")
+        if angle not in ANGLES:
+            parser.error(f"--sources angle {angle!r} must be one of: {', '.join(ANGLES)}")
+        if angle in sources:
+            parser.error(f"--sources angle {angle!r} given more than once")
+        sources[angle] = int(source) if source.isdigit() else source
+    
     # Initialize helpers
     metadata_manager = GolferMetadata()
     data_collector = EnhancedDataCollector()
@@ -62,6 +79,24 @@ def main():
         output_dir = f"data/raw_videos/{args.category}"
         os.makedirs(output_dir, exist_ok=True)
         
+        if sources:
+            # Multi-view: one camera per angle, recorded together
+            camera_setup = {}
+            for angle in sources:
+                camera_setup[angle] = (
+                    float(input(f"[{angle}] Camera distance from golfer (feet): ")),
+                    float(input(f"[{angle}] Camera height (feet): "))
+                )
+                
+            data_collector.record_multi_view(
+                args.golfer_id,
+                args.club,
+                sources,
+                camera_setup,
+                output_dir
+            )
+            return
+            
         # Get recording parameters
         camera_distance = float(input("Camera distance from golfer (feet): "))
         camera_height = float(input("Camera height (feet): "))
@@ -6,12 +6,84 @@ import json
 import pandas as pd
 from golfer_metadata import GolferMetadata
 import time
+from concurrent.futures import ThreadPoolExecutor
+from multi_camera import CameraStream, align_streams
+
+NUM_LANDMARKS = 33
+
+# Auto-stop after 5 seconds (150 frames at 30fps)
+MAX_RECORDING_FRAMES = 150
+
+# Cap on container frame counts used to presize keypoint arrays; they come
+# from untrusted metadata, and longer videos still grow geometrically
+MAX_FRAME_COUNT_HINT = MAX_RECORDING_FRAMES * 4
+
+# Reusable RGB conversion buffers; MediaPipe copies its input, so two is plenty
+RGB_RING_SIZE = 2
+
+class PoseExtractor:
+    """MediaPipe Pose and reusable conversion buffers for one video stream."""
+    
+    def __init__(self, model_complexity=1):
+        # Initialize MediaPipe Pose (model_complexity 0 is the fast production setting)
+        self.pose = mp.solutions.pose.Pose(model_complexity=model_complexity,
+                                           min_detection_confidence=0.5)
+        
+        # Preallocated RGB frames reused across extract_keypoints calls
+        self.rgb_buffers = []
+        self.rgb_index = 0
+        
+    def rgb_buffer(self, frame):
+        """Return the next preallocated RGB buffer matching the frame's shape."""
+        if not self.rgb_buffers or self.rgb_buffers[0].shape != frame.shape:
+            self.rgb_buffers = [np.empty_like(frame) for _ in range(RGB_RING_SIZE)]
+        buffer = self.rgb_buffers[self.rgb_index]
+        self.rgb_index = (self.rgb_index + 1) % RGB_RING_SIZE
+        return buffer
+        
+    def extract_keypoints(self, frames, frame_count=None):
+        """Extract pose keypoints from a sequence of frames.
+        
+        Returns a float32 array of shape (T, 33 * 4). frames may be any
+        iterable; frame_count sizes the output up front when it has no len().
+        """
+        if frame_count is None:
+            frame_count = len(frames) if hasattr(frames, '__len__') else 0
+        landmarks = np.zeros((max(frame_count, 1), NUM_LANDMARKS, 4), dtype=np.float32)
+        
+        n = 0
+        for frame in frames:
+            if n == len(landmarks):
+                # Frame count was unknown or underestimated, grow geometrically
+                landmarks = np.concatenate([landmarks, np.zeros_like(landmarks)])
+                
+            # Convert to RGB for MediaPipe, into a reused buffer
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.rgb_buffer(frame))
+            results = self.pose.process(frame_rgb)
+            
+            if results.pose_landmarks:
+                # Landmarks are protobuf messages, so read them in one pass into the row
+                landmarks[n] = np.fromiter(
+                    (value for landmark in results.pose_landmarks.landmark
+                     for value in (landmark.x, landmark.y, landmark.z, landmark.visibility)),
+                    dtype=np.float32, count=NUM_LANDMARKS * 4
+                ).reshape(NUM_LANDMARKS, 4)
+            # If no landmarks detected, the row stays zero
+            n += 1
+                
+        keypoints = landmarks[:n].reshape(n, NUM_LANDMARKS * 4)
+        if n < len(landmarks) // 2:
+            # Don't keep a mostly unused (overestimated) allocation alive
+            keypoints = keypoints.copy()
+        return keypoints
 
 class EnhancedDataCollector:
-    def __init__(self):
-        # Initialize MediaPipe Pose
+    def __init__(self, model_complexity=1):
+        # Pose tracking is stateful, so each camera view gets its own extractor
+        self.model_complexity = model_complexity
+        self.extractors = [PoseExtractor(model_complexity)]
         self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(min_detection_confidence=0.5)
+        self.pose = self.extractors[0].pose
         
         # Initialize metadata tracker
         self.metadata_manager = GolferMetadata()
@@ -34,16 +106,22 @@ class EnhancedDataCollector:
         
         # Prepare for recording
         cap = cv2.VideoCapture(0)
-        frames = []
+        preview = None
+        frames = None
+        frame_count = 0
         recording = False
         
         print("Position for swing and press SPACE to start recording")
         print("Press ESC to cancel")
         
         while True:
-            ret, frame = cap.read()
+            # Read straight into the recording buffer once recording has started
+            target = frames[frame_count] if recording else preview
+            ret, frame = cap.read(target)
             if not ret:
                 break
+            if preview is None:
+                preview = frame
                 
             # Show recording status
             status_text = "RECORDING" if recording else "Press SPACE to start"
@@ -57,6 +135,8 @@ class EnhancedDataCollector:
             if key == ord(' ') and not recording:
                 # Start recording
                 recording = True
+                if frames is None:
+                    frames = np.empty((MAX_RECORDING_FRAMES,) + frame.shape, dtype=frame.dtype)
                 print("Recording started... make your swing")
             elif key == 27:  # ESC
                 print("Recording cancelled")
@@ -65,34 +145,44 @@ class EnhancedDataCollector:
                 return None
             
             if recording:
-                frames.append(frame.copy())
+                # Only the first recorded frame (read into the preview buffer) needs a copy
+                if not np.may_share_memory(frame, frames[frame_count]):
+                    frames[frame_count] = frame
+                frame_count += 1
                 
-                # Auto-stop after 5 seconds (150 frames at 30fps)
-                if len(frames) >= 150:
+                if frame_count >= MAX_RECORDING_FRAMES:
                     break
         
         cap.release()
         cv2.destroyAllWindows()
         
+        if not frame_count:
+            print("No frames recorded")
+            return None
+        frames = frames[:frame_count]
+        
         # Save video
         video_path = f"{output_dir}/{swing_id}.mp4"
-        height, width = frames[0].shape[:2]
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(video_path, fourcc, 30, (width, height))
-        
-        for frame in frames:
-            out.write(frame)
-        out.release()
+        write_video(video_path, frames, frames[0].shape)
         
         # Extract keypoints
         keypoints = self.extract_keypoints(frames)
         
-        # Save keypoints
-        keypoints_df = pd.DataFrame(keypoints)
-        keypoints_df.to_csv(f"{output_dir}/{swing_id}_keypoints.csv", index=False)
+        # Save keypoints and metadata
+        metadata = self.build_metadata(
+            swing_id, golfer_id, club_type, camera_distance_ft,
+            camera_height_ft, angle_type, frame_count)
+        self.save_swing(swing_id, keypoints, metadata, output_dir)
+            
+        print(f"Swing recorded: {swing_id}")
+        print(f"Video saved to: {video_path}")
+        
+        return swing_id
         
-        # Save metadata
-        metadata = {
+    def build_metadata(self, swing_id, golfer_id, club_type, camera_distance_ft,
+                       camera_height_ft, angle_type, frame_count):
+        """Build the metadata record stored alongside a swing."""
+        return {
             'swing_id': swing_id,
             'golfer_id': golfer_id,
             'club_type': club_type,
@@ -100,35 +190,168 @@ class EnhancedDataCollector:
             'camera_height_ft': camera_height_ft,
             'angle_type': angle_type,
             'timestamp': time.time(),
-            'frame_count': len(frames),
+            'frame_count': frame_count,
             'px_per_inch': self.px_per_inch
         }
         
+    def save_swing(self, swing_id, keypoints, metadata, output_dir):
+        """Write keypoints CSV and metadata JSON for a swing."""
+        os.makedirs(output_dir, exist_ok=True)
+        
+        keypoints_df = pd.DataFrame(keypoints)
+        keypoints_df.to_csv(f"{output_dir}/{swing_id}_keypoints.csv", index=False)
+        
         with open(f"{output_dir}/{swing_id}_metadata.json", 'w') as f:
             json.dump(metadata, f, indent=2)
-            
-        print(f"Swing recorded: {swing_id}")
-        print(f"Video saved to: {video_path}")
         
-        return swing_id
+    def extract_keypoints(self, frames, frame_count=None):
+        """Extract pose keypoints from a sequence of frames as a (T, 33 * 4) array."""
+        return self.extractors[0].extract_keypoints(frames, frame_count)
+    
+    def extract_keypoints_batch(self, frame_sequences, frame_counts=None):
+        """Extract keypoints for several synchronized views in one job.
         
-    def extract_keypoints(self, frames):
-        """Extract pose keypoints from a sequence of frames."""
-        keypoints = []
+        Each view runs on its own PoseExtractor (tracking state is per
+        stream), concurrently on a thread per view.
+        """
+        while len(self.extractors) < len(frame_sequences):
+            self.extractors.append(PoseExtractor(self.model_complexity))
+        if frame_counts is None:
+            frame_counts = [None] * len(frame_sequences)
+            
+        with ThreadPoolExecutor(max_workers=len(frame_sequences)) as pool:
+            jobs = [pool.submit(extractor.extract_keypoints, frames, count)
+                    for extractor, frames, count
+                    in zip(self.extractors, frame_sequences, frame_counts)]
+            return [job.result() for job in jobs]
+    
+    def record_multi_view(self, golfer_id, club_type, sources, camera_setup,
+                          output_dir='data/swings', max_skew=0.02):
+        """Record one swing from several cameras/videos as a linked set of swings.
         
-        for frame in frames:
-            # Convert to RGB for MediaPipe
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.pose.process(frame_rgb)
+        sources maps angle type to a camera index or video path, e.g.
+        {'face-on': 0, 'down-the-line': 1}, and camera_setup maps angle type
+        to (camera_distance_ft, camera_height_ft). Returns {angle: swing_id}.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        timestamp = int(time.time())
+        pair_id = f"{golfer_id}_{club_type}_multi_{timestamp}"
+        angles = list(sources)
+        swing_ids = {angle: f"{golfer_id}_{club_type}_{angle}_{timestamp}" for angle in angles}
+        
+        streams = [CameraStream(sources[angle], MAX_RECORDING_FRAMES) for angle in angles]
+        for stream in streams:
+            stream.start()
             
-            if results.pose_landmarks:
-                # Extract frame keypoints
-                frame_keypoints = []
-                for landmark in results.pose_landmarks.landmark:
-                    frame_keypoints.extend([landmark.x, landmark.y, landmark.z, landmark.visibility])
-                keypoints.append(frame_keypoints)
-            else:
-                # If no landmarks detected, add zeros
-                keypoints.append([0.0] * (33 * 4))  # 33 landmarks * 4 values
+        if all(stream.is_file for stream in streams):
+            # Nothing to frame up, replay the files straight away
+            start_time = time.monotonic()
+            for stream in streams:
+                stream.start_recording(start_time)
+        else:
+            print("Position for swing and press SPACE to start recording")
+            print("Press ESC to cancel")
+            
+        while not all(stream.done.is_set() for stream in streams):
+            recording = streams[0].recording.is_set()
+            for angle, stream in zip(angles, streams):
+                frame = stream.latest
+                if frame is None:
+                    continue
+                if not recording:
+                    # Recorded frames are shown as-is so the overlay isn't saved
+                    cv2.putText(frame, "Press SPACE to start", (10, 30),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                cv2.imshow(f'Record Swing ({angle})', frame)
                 
-        return keypoints
+            key = cv2.waitKey(1) & 0xFF
+            if key == ord(' ') and not recording:
+                start_time = time.monotonic()
+                for stream in streams:
+                    stream.start_recording(start_time)
+                print("Recording started... make your swing")
+            elif key == 27:  # ESC
+                print("Recording cancelled")
+                for stream in streams:
+                    stream.stop()
+                cv2.destroyAllWindows()
+                return None
+                
+        for stream in streams:
+            stream.stop()
+        cv2.destroyAllWindows()
+        
+        # Keep only frames that line up across every view
+        recorded = [stream.recorded() for stream in streams]
+        indices, worst_skew = align_streams([times for _, times in recorded], max_skew)
+        frame_count = len(indices[0])
+        if not frame_count:
+            print("No synchronized frames recorded")
+            return None
+            
+        for angle, (frames, _), idx in zip(angles, recorded, indices):
+            write_video(f"{output_dir}/{swing_ids[angle]}.mp4",
+                        map(frames.__getitem__, idx), frames.shape[1:])
+            
+        keypoints = self.extract_keypoints_batch(
+            [map(frames.__getitem__, idx) for (frames, _), idx in zip(recorded, indices)],
+            [frame_count] * len(angles))
+        
+        for angle, stream, (frames, times), idx, view_keypoints in zip(
+                angles, streams, recorded, indices, keypoints):
+            camera_distance_ft, camera_height_ft = camera_setup[angle]
+            metadata = self.build_metadata(
+                swing_ids[angle], golfer_id, club_type, camera_distance_ft,
+                camera_height_ft, angle, frame_count)
+            metadata['pair_id'] = pair_id
+            metadata['linked_swing_ids'] = {other: swing_ids[other]
+                                            for other in angles if other != angle}
+            metadata['sync'] = {
+                'source': str(stream.source),
+                'frame_times_s': times[idx].round(4).tolist(),
+                'dropped_frames': len(frames) - frame_count,
+                'max_skew_s': worst_skew
+            }
+            self.save_swing(swing_ids[angle], view_keypoints, metadata, output_dir)
+            
+        print(f"Multi-view swing recorded: {pair_id}")
+        for angle in angles:
+            print(f"  {angle}: {swing_ids[angle]}")
+            
+        return swing_ids
+    
+    def extract_keypoints_from_video(self, video_path):
+        """Extract pose keypoints from a video file without keeping its frames."""
+        cap = cv2.VideoCapture(video_path)
+        frame_count = min(max(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 0), MAX_FRAME_COUNT_HINT)
+        try:
+            return self.extract_keypoints(iter_video_frames(cap), frame_count)
+        finally:
+            cap.release()
+
+def write_video(video_path, frames, frame_shape, fps=30):
+    """Write BGR frames (any iterable) to an mp4 file."""
+    height, width = frame_shape[:2]
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    out = cv2.VideoWriter(video_path, fourcc, fps, (width, height))
+    
+    for frame in frames:
+        out.write(frame)
+    out.release()
+
+def iter_video_frames(cap, ring_size=2):
+    """Yield frames from a capture, decoding into a small ring of reused arrays.
+    
+    Each yielded frame is overwritten ring_size reads later, so consumers
+    must finish with it (or copy it) before advancing.
+    """
+    ret, frame = cap.read()
+    if not ret:
+        return
+    ring = [frame] + [np.empty_like(frame) for _ in range(ring_size - 1)]
+    
+    index = 0
+    while ret:
+        yield frame
+        index = (index + 1) % ring_size
+        ret, frame = cap.read(ring[index])
@@ -1,3 +1,4 @@
+import argparse
 import tensorflow as tf
 import numpy as np
 import pandas as pd
@@ -5,6 +6,41 @@ import json
 import os
 import glob
 from sklearn.model_selection import train_test_split
+from pose_postprocessing import prepare_sequence
+from training_telemetry import TrainingTelemetry
+
+# Metadata features (golfer stats + recording conditions)
+METADATA_COLUMNS = [
+    'height_cm', 'weight_kg', 'handicap', 'experience_years',
+    'male', 'female', 'camera_distance_ft', 'camera_height_ft',
+    'face_on', 'down_the_line'
+]
+
+LABEL_COLUMNS = ['label_good', 'label_over_the_top',
+                 'label_early_extension', 'label_casting']
+
+DEFAULT_GOLFER_METADATA = {
+    'height_cm': 175.0,
+    'weight_kg': 75.0,
+    'handicap': 15.0,
+    'years_playing': 5.0,
+    'gender': 'unknown'
+}
+
+def build_metadata_features(metadata, golfer_metadata):
+    """Build the metadata feature dict for a swing and its golfer."""
+    return {
+        'height_cm': golfer_metadata.get('height_cm', 175.0),
+        'weight_kg': golfer_metadata.get('weight_kg', 75.0),
+        'handicap': golfer_metadata.get('handicap', 15.0),
+        'experience_years': golfer_metadata.get('years_playing', 5.0),
+        'male': 1 if golfer_metadata.get('gender', '').lower().startswith('m') else 0,
+        'female': 1 if golfer_metadata.get('gender', '').lower().startswith('f') else 0,
+        'camera_distance_ft': metadata.get('camera_distance_ft', 12.0),
+        'camera_height_ft': metadata.get('camera_height_ft', 4.0),
+        'face_on': 1 if metadata.get('angle_type') == 'face-on' else 0,
+        'down_the_line': 1 if metadata.get('angle_type') == 'down-the-line' else 0,
+    }
 
 def load_dataset_with_metadata(base_dir='data/raw_videos'):
     """Load processed data with metadata."""
@@ -38,37 +74,17 @@ def load_dataset_with_metadata(base_dir='data/raw_videos'):
             
             if not golfer_metadata:
                 print(f"Warning: No golfer data for ID {golfer_id}, using defaults")
-                golfer_metadata = {
-                    'height_cm': 175.0,
-                    'weight_kg': 75.0,
-                    'handicap': 15.0,
-                    'years_playing': 5.0,
-                    'gender': 'unknown'
-                }
+                golfer_metadata = DEFAULT_GOLFER_METADATA
             
-            # Normalize sequence length
-            if len(keypoints) > 60:
-                start_idx = max(0, len(keypoints) // 2 - 30)
-                keypoints = keypoints[start_idx:start_idx + 60]
-            else:
-                padding = np.zeros((60 - len(keypoints), keypoints.shape[1]))
-                keypoints = np.vstack([keypoints, padding])
+            # Fill short detection gaps and normalize sequence length
+            keypoints = prepare_sequence(keypoints)
                 
             # Create record with metadata features
             record = {
                 'file_name': base_name,
                 'category': category,
                 'keypoints': keypoints.tolist(),
-                'height_cm': golfer_metadata.get('height_cm', 175.0),
-                'weight_kg': golfer_metadata.get('weight_kg', 75.0),
-                'handicap': golfer_metadata.get('handicap', 15.0),
-                'experience_years': golfer_metadata.get('years_playing', 5.0),
-                'male': 1 if golfer_metadata.get('gender', '').lower().startswith('m') else 0,
-                'female': 1 if golfer_metadata.get('gender', '').lower().startswith('f') else 0,
-                'camera_distance_ft': metadata.get('camera_distance_ft', 12.0),
-                'camera_height_ft': metadata.get('camera_height_ft', 4.0),
-                'face_on': 1 if metadata.get('angle_type') == 'face-on' else 0,
-                'down_the_line': 1 if metadata.get('angle_type') == 'down-the-line' else 0,
+                **build_metadata_features(metadata, golfer_metadata),
                 'club_type': metadata.get('club_type', 'unknown'),
                 'label_good': 1 if category == 'good' else 0,
                 'label_over_the_top': 1 if category == 'over-the-top' else 0,
@@ -97,7 +113,9 @@ def build_enhanced_model(input_shape, metadata_shape):
     """Build model that incorporates golfer metadata."""
     # Pose sequence input
     pose_input = tf.keras.Input(shape=input_shape, name='pose_input')
-    pose_features = tf.keras.layers.LSTM(64, return_sequences=True)(pose_input)
+    # Skip all-zero frames (padding and undetected poses)
+    pose_features = tf.keras.layers.Masking(mask_value=0.0)(pose_input)
+    pose_features = tf.keras.layers.LSTM(64, return_sequences=True)(pose_features)
     pose_features = tf.keras.layers.LSTM(32)(pose_features)
     pose_features = tf.keras.layers.Dense(16, activation='relu')(pose_features)
     
@@ -127,25 +145,17 @@ def build_enhanced_model(input_shape, metadata_shape):
     
     return model
 
-def train_enhanced_model():
+def train_enhanced_model(profile_steps=None):
     # Load dataset with metadata
     dataset = load_dataset_with_metadata()
     
     # Prepare features
     X_pose = np.array([np.array(k) for k in dataset['keypoints']])
     
-    # Metadata features (golfer stats + recording conditions)
-    metadata_columns = [
-        'height_cm', 'weight_kg', 'handicap', 'experience_years',
-        'male', 'female', 'camera_distance_ft', 'camera_height_ft',
-        'face_on', 'down_the_line'
-    ]
-    
-    X_metadata = dataset[metadata_columns].values
+    X_metadata = dataset[METADATA_COLUMNS].values
     
     # Labels
-    y = dataset[['label_good', 'label_over_the_top', 
-                'label_early_extension', 'label_casting']].values
+    y = dataset[LABEL_COLUMNS].values
     
     # Split data
     X_pose_train, X_pose_test, X_metadata_train, X_metadata_test, y_train, y_test = train_test_split(
@@ -167,7 +177,9 @@ def train_enhanced_model():
         validation_data=({'pose_input': X_pose_test, 'metadata_input': X_metadata_test}, y_test),
         callbacks=[
             tf.keras.callbacks.EarlyStopping(patience=5, restore_best_weights=True),
-            tf.keras.callbacks.ModelCheckpoint('models/enhanced_model.h5', save_best_only=True)
+            tf.keras.callbacks.ModelCheckpoint('models/enhanced_model.h5', save_best_only=True),
+            TrainingTelemetry(batch_size=16, num_samples=len(X_pose_train),
+                              profile_steps=profile_steps)
         ]
     )
     
@@ -185,4 +197,8 @@ def train_enhanced_model():
     return model, history
 
 if __name__ == "__main__":
-    train_enhanced_model()
+    parser = argparse.ArgumentParser(description='Train the enhanced swing analyzer')
+    parser.add_argument('--profile-steps', type=int, nargs=2, metavar=('START', 'STOP'),
+                        help='Capture a TensorBoard profiler trace for this global step range')
+    args = parser.parse_args()
+    train_enhanced_model(profile_steps=args.profile_steps)
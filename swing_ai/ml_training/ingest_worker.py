@@ -0,0 +1,430 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Directories
+INBOX_DIR = 'data/inbox'
+OUTPUT_DIR = 'data/raw_videos'
+# One SHA-256 per line, appended as uploads are ingested
+SEEN_HASHES_FILE = 'data/ingest_seen_hashes.txt'
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi')
+KEYPOINT_EXTENSIONS = ('.swkp',)
+
+# Output subdirectories an upload may be filed under (training categories + unlabeled)
+CATEGORIES = ['good', 'over-the-top', 'early-extension', 'casting', 'unlabeled']
+
+# Sidecar fields that end up in file names
+ID_FIELDS = ['golfer_id', 'club_type', 'angle_type']
+SAFE_ID = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]*$')
+
+# Times an upload is retried after its pool process died before it is failed
+MAX_POOL_RETRIES = 2
+
+# Sidecars with no upload for this long are moved to failed/
+ORPHAN_SIDECAR_SECONDS = 300
+
+# Per-process state, created once by the pool initializer
+_collector = None
+_analyzer = None
+
+def _init_worker(score_threshold, model_complexity):
+    """Load MediaPipe (and optionally the TFLite models) once per pool process."""
+    global _collector, _analyzer
+    from enhanced_data_collector import EnhancedDataCollector
+    _collector = EnhancedDataCollector(model_complexity=model_complexity)
+
+    if score_threshold is not None:
+        from cascade_inference import CascadeSwingAnalyzer
+        _analyzer = CascadeSwingAnalyzer(good_threshold=score_threshold)
+
+def process_upload(upload_path, upload_info, sha256, output_dir):
+    """Pool job: extract keypoints, save them like record_swing, optionally score."""
+    validate_upload_info(upload_info)
+    timings = {}
+
+    start = time.perf_counter()
+    if upload_path.lower().endswith(KEYPOINT_EXTENSIONS):
+        # The app already ran pose detection and sent encoded keypoints
+        from keypoint_codec import load_keypoints, NUM_LANDMARKS
+        keypoints = load_keypoints(upload_path, expected_landmarks=NUM_LANDMARKS)
+    else:
+        keypoints = _collector.extract_keypoints_from_video(upload_path)
+    if not len(keypoints):
+        raise ValueError(f"No frames could be read from {upload_path}")
+    timings['extract'] = time.perf_counter() - start
+
+    golfer_id = upload_info.get('golfer_id', 'unknown')
+    club_type = upload_info.get('club_type', 'unknown')
+    angle_type = upload_info.get('angle_type', 'face-on')
+    swing_id = f"{golfer_id}_{club_type}_{angle_type}_{int(time.time())}_{sha256[:8]}"
+
+    metadata = _collector.build_metadata(
+        swing_id, golfer_id, club_type,
+        upload_info.get('camera_distance_ft', 12.0),
+        upload_info.get('camera_height_ft', 4.0),
+        angle_type, len(keypoints))
+    metadata['source_sha256'] = sha256
+    metadata['source_file'] = os.path.basename(upload_path)
+
+    if _analyzer is not None:
+        from enhanced_training import (get_golfer_metadata, build_metadata_features,
+                                       METADATA_COLUMNS, DEFAULT_GOLFER_METADATA)
+        start = time.perf_counter()
+        golfer_metadata = get_golfer_metadata(golfer_id) or DEFAULT_GOLFER_METADATA
+        features = build_metadata_features(metadata, golfer_metadata)
+        metadata['analysis'] = _analyzer.analyze(
+            keypoints, [features[c] for c in METADATA_COLUMNS])
+        timings['score'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _collector.save_swing(swing_id, keypoints, metadata, output_dir)
+    timings['write'] = time.perf_counter() - start
+
+    return swing_id, timings
+
+def validate_upload_info(upload_info):
+    """Check sidecar fields that are used in paths; raise ValueError if unsafe."""
+    if not isinstance(upload_info, dict):
+        raise ValueError("Sidecar must be a JSON object")
+
+    category = upload_info.get('category', 'unlabeled')
+    if category not in CATEGORIES:
+        raise ValueError(f"Invalid category: {category!r}")
+
+    for field in ID_FIELDS:
+        value = upload_info.get(field)
+        if value is None:
+            continue
+        if not isinstance(value, str) or not SAFE_ID.match(value) or '..' in value:
+            raise ValueError(f"Invalid {field}: {value!r}")
+    return upload_info
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Hash a file's contents for upload deduplication."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def read_sidecar(path):
+    """Load the JSON sidecar next to an upload, or {} if there is none."""
+    sidecar = os.path.splitext(path)[0] + '.json'
+    if not os.path.exists(sidecar):
+        return {}
+    with open(sidecar, 'r') as f:
+        return json.load(f)
+
+def move_files(path, dest_dir, dest_name):
+    """Move an upload and its sidecar to dest_dir, renaming both to dest_name."""
+    os.makedirs(dest_dir, exist_ok=True)
+    sidecar = os.path.splitext(path)[0] + '.json'
+    if os.path.exists(path):
+        shutil.move(path, os.path.join(dest_dir, dest_name))
+    if os.path.exists(sidecar):
+        shutil.move(sidecar, os.path.join(dest_dir, os.path.splitext(dest_name)[0] + '.json'))
+
+def file_size(path):
+    """Size of path in bytes, or None if it doesn't exist."""
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return None
+
+class StageMetrics:
+    """Running count, error count and latency totals for one pipeline stage."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds):
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def summary(self):
+        mean = self.total_seconds / self.count if self.count else 0.0
+        return (f"n={self.count} err={self.errors} "
+                f"mean={mean * 1000:.0f}ms max={self.max_seconds * 1000:.0f}ms")
+
+class IngestWorker:
+    """Asyncio daemon turning uploads in an inbox directory into analyzed swings.
+
+    Uploads are video files or .swkp keypoint streams (see keypoint_codec),
+    each with an optional JSON sidecar of the same name (golfer_id,
+    club_type, camera_distance_ft, camera_height_ft, angle_type, category).
+
+    Upload protocol: write the sidecar first, then write the upload under a
+    name without a video/.swkp extension (e.g. swing.mp4.part) and rename it
+    into place once complete. As a fallback for clients that don't, an
+    upload is only picked up once both it and its sidecar have kept the same
+    size for a whole poll interval. Sidecars left without an upload for
+    ORPHAN_SIDECAR_SECONDS are moved to failed/.
+
+    Bounded queues between the stages provide backpressure: when
+    pose extraction falls behind, the hasher and then the watcher stall
+    instead of piling up work.
+    """
+
+    def __init__(self, inbox_dir=INBOX_DIR, output_dir=OUTPUT_DIR, workers=2,
+                 queue_size=8, poll_interval=0.5, score_threshold=None,
+                 model_complexity=1, metrics_interval=30.0):
+        self.inbox_dir = inbox_dir
+        self.output_dir = output_dir
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.score_threshold = score_threshold
+        self.model_complexity = model_complexity
+        self.metrics_interval = metrics_interval
+        self.pool = None
+
+        self.hash_queue = asyncio.Queue(maxsize=queue_size)
+        self.extract_queue = asyncio.Queue(maxsize=queue_size)
+
+        # Files currently somewhere in the pipeline, and last-seen (upload, sidecar)
+        # sizes for settle detection
+        self.in_flight = set()
+        self.pending_sizes = {}
+        self.seen_hashes = self.load_seen_hashes()
+        self.inflight_hashes = set()
+
+        self.metrics = {stage: StageMetrics()
+                        for stage in ['hash', 'extract', 'score', 'write', 'end_to_end']}
+        self.duplicates = 0
+
+        for subdir in ['duplicates', 'failed']:
+            os.makedirs(os.path.join(self.inbox_dir, subdir), exist_ok=True)
+
+    def load_seen_hashes(self):
+        if not os.path.exists(SEEN_HASHES_FILE):
+            return set()
+        with open(SEEN_HASHES_FILE, 'r') as f:
+            # A line cut short by a crash just never matches
+            return {line.strip() for line in f if line.strip()}
+
+    def append_seen_hash(self, sha256):
+        os.makedirs(os.path.dirname(SEEN_HASHES_FILE), exist_ok=True)
+        with open(SEEN_HASHES_FILE, 'a') as f:
+            f.write(sha256 + '\n')
+
+    def scan_inbox(self):
+        """Return uploads that, with their sidecars, have been stable since the previous scan."""
+        ready = []
+        names = sorted(os.listdir(self.inbox_dir))
+
+        # Forget uploads that disappeared while we were waiting for them to settle
+        listed = {os.path.join(self.inbox_dir, name) for name in names}
+        for path in list(self.pending_sizes):
+            if path not in listed:
+                del self.pending_sizes[path]
+
+        upload_stems = {os.path.splitext(name)[0] for name in names
+                        if name.lower().endswith(VIDEO_EXTENSIONS + KEYPOINT_EXTENSIONS)}
+        for name in names:
+            path = os.path.join(self.inbox_dir, name)
+            stem, extension = os.path.splitext(name)
+            if extension.lower() == '.json' and stem not in upload_stems:
+                self.fail_orphan_sidecar(path)
+                continue
+            if not name.lower().endswith(VIDEO_EXTENSIONS + KEYPOINT_EXTENSIONS) or path in self.in_flight:
+                continue
+
+            try:
+                size = os.path.getsize(path)
+            except FileNotFoundError:
+                # Deleted between listdir and getsize
+                self.pending_sizes.pop(path, None)
+                continue
+            sizes = (size, file_size(os.path.splitext(path)[0] + '.json'))
+            if self.pending_sizes.get(path) == sizes:
+                del self.pending_sizes[path]
+                ready.append(path)
+            else:
+                # Still being written (or first sighting), check again next poll
+                self.pending_sizes[path] = sizes
+        return ready
+
+    def fail_orphan_sidecar(self, path):
+        """Move a sidecar out of the inbox once it has waited too long for its upload."""
+        try:
+            if time.time() - os.path.getmtime(path) > ORPHAN_SIDECAR_SECONDS:
+                print(f"No upload arrived for sidecar {path}")
+                shutil.move(path, os.path.join(self.inbox_dir, 'failed', os.path.basename(path)))
+        except FileNotFoundError:
+            pass
+
+    async def watch(self, once=False):
+        while True:
+            for path in self.scan_inbox():
+                self.in_flight.add(path)
+                # Blocks while the pipeline is full
+                await self.hash_queue.put((path, time.perf_counter()))
+
+            if once and not self.pending_sizes:
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    async def hash_stage(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            path, detected_at = await self.hash_queue.get()
+            try:
+                start = time.perf_counter()
+                sha256 = await loop.run_in_executor(None, file_sha256, path)
+                self.metrics['hash'].record(time.perf_counter() - start)
+
+                if sha256 in self.seen_hashes or sha256 in self.inflight_hashes:
+                    self.duplicates += 1
+                    await self.move_upload(path, os.path.join(self.inbox_dir, 'duplicates'))
+                    continue
+
+                self.inflight_hashes.add(sha256)
+                await self.extract_queue.put((path, sha256, detected_at))
+            except Exception as e:
+                self.metrics['hash'].errors += 1
+                print(f"Hashing failed for {path}: {e}")
+                await self.move_upload(path, os.path.join(self.inbox_dir, 'failed'))
+            finally:
+                self.hash_queue.task_done()
+
+    def make_pool(self):
+        # Spawn so pool processes don't inherit TensorFlow/MediaPipe state
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self.score_threshold, self.model_complexity)
+        )
+
+    def replace_broken_pool(self, broken_pool):
+        """Rebuild the pool after a worker process died (segfault, OOM kill)."""
+        # Several uploads see the same crash; only the first one rebuilds
+        if self.pool is broken_pool:
+            print("[ingest] pool process died, restarting the process pool")
+            broken_pool.shutdown(wait=False)
+            self.pool = self.make_pool()
+
+    async def run_upload(self, path, upload_info, sha256, output_dir):
+        """Run process_upload on the pool, retrying uploads caught by a pool crash."""
+        loop = asyncio.get_running_loop()
+        for attempt in range(MAX_POOL_RETRIES + 1):
+            pool = self.pool
+            try:
+                return await loop.run_in_executor(
+                    pool, process_upload, path, upload_info, sha256, output_dir)
+            except BrokenProcessPool:
+                self.replace_broken_pool(pool)
+                if attempt == MAX_POOL_RETRIES:
+                    raise
+                print(f"Retrying {path} after pool crash")
+
+    async def extract_stage(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            path, sha256, detected_at = await self.extract_queue.get()
+            try:
+                upload_info = validate_upload_info(
+                    await loop.run_in_executor(None, read_sidecar, path))
+                output_dir = os.path.join(self.output_dir,
+                                          upload_info.get('category', 'unlabeled'))
+
+                swing_id, timings = await self.run_upload(path, upload_info, sha256, output_dir)
+                for stage, seconds in timings.items():
+                    self.metrics[stage].record(seconds)
+
+                # Keep the upload next to its keypoints, as record_swing does
+                extension = os.path.splitext(path)[1]
+                await self.move_upload(path, output_dir, f"{swing_id}{extension}")
+
+                self.seen_hashes.add(sha256)
+                await loop.run_in_executor(None, self.append_seen_hash, sha256)
+                self.metrics['end_to_end'].record(time.perf_counter() - detected_at)
+                print(f"Ingested {os.path.basename(path)} as {swing_id}")
+            except Exception as e:
+                self.metrics['extract'].errors += 1
+                print(f"Processing failed for {path}: {e}")
+                await self.move_upload(path, os.path.join(self.inbox_dir, 'failed'))
+            finally:
+                self.inflight_hashes.discard(sha256)
+                self.extract_queue.task_done()
+
+    async def move_upload(self, path, dest_dir, dest_name=None):
+        """Move an upload (and its sidecar) out of the inbox."""
+        if dest_name is None:
+            dest_name = os.path.basename(path)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, move_files, path, dest_dir, dest_name)
+        self.in_flight.discard(path)
+
+    def print_metrics(self):
+        print(f"[ingest] queues: hash={self.hash_queue.qsize()} "
+              f"extract={self.extract_queue.qsize()} duplicates={self.duplicates}")
+        for stage, metrics in self.metrics.items():
+            print(f"[ingest]   {stage:<10} {metrics.summary()}")
+
+    async def report_metrics(self):
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            self.print_metrics()
+
+    async def run(self, once=False):
+        """Run the pipeline forever, or until the current inbox is drained if once."""
+        self.pool = self.make_pool()
+        tasks = [asyncio.create_task(self.hash_stage())]
+        tasks += [asyncio.create_task(self.extract_stage()) for _ in range(self.workers)]
+        tasks.append(asyncio.create_task(self.report_metrics()))
+
+        try:
+            await self.watch(once=once)
+            await self.hash_queue.join()
+            await self.extract_queue.join()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.pool.shutdown()
+            self.print_metrics()
+
+def main():
+    parser = argparse.ArgumentParser(description='Swing video ingest worker')
+    parser.add_argument('--inbox', type=str, default=INBOX_DIR, help='Directory to watch for uploads')
+    parser.add_argument('--output', type=str, default=OUTPUT_DIR, help='Directory for processed swings')
+    parser.add_argument('--workers', type=int, default=2, help='Pose extraction processes')
+    parser.add_argument('--queue-size', type=int, default=8, help='Max uploads waiting per stage')
+    parser.add_argument('--score', action='store_true', help='Score swings with the TFLite models')
+    parser.add_argument('--threshold', type=float, default=0.9,
+                        help='Gate confidence threshold used when scoring')
+    parser.add_argument('--model-complexity', type=int, choices=[0, 1, 2], default=1,
+                        help='MediaPipe Pose model complexity (0 is fastest)')
+    parser.add_argument('--once', action='store_true', help='Drain the inbox and exit')
+    args = parser.parse_args()
+
+    os.makedirs(args.inbox, exist_ok=True)
+    worker = IngestWorker(
+        inbox_dir=args.inbox,
+        output_dir=args.output,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        score_threshold=args.threshold if args.score else None,
+        model_complexity=args.model_complexity
+    )
+
+    try:
+        asyncio.run(worker.run(once=args.once))
+    except KeyboardInterrupt:
+        print("Ingest worker stopped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Compact binary encoding for keypoint sequences (.swkp).
+
+A swing's keypoints (T frames x 33 landmarks x [x, y, z, visibility], as
+produced by EnhancedDataCollector.extract_keypoints) are quantized and
+packed so the app can upload them instead of a video or CSV.
+
+Layout (all integers little-endian):
+
+    Header, 16 bytes
+      offset 0   4 bytes  magic b'SWKP'
+      offset 4   uint8    format version (1)
+      offset 5   uint8    flags: bit 0 = delta encoded,
+                          bits 1-2 = compression (0 none, 1 zlib, 2 zstd)
+      offset 6   uint8    landmark count L (33 for MediaPipe Pose)
+      offset 7   uint8    reserved, 0
+      offset 8   uint32   frame count T
+      offset 12  uint16   position scale S
+      offset 14  uint16   reserved, 0
+
+    Payload (compressed as a whole if a compression is set)
+      int16[T][L][3]  x, y, z quantized as round(v * S), clipped to int16
+      uint8[T][L]     visibility quantized as round(v * 255), clipped to uint8
+
+With delta encoding, frame 0 holds absolute values and frame t holds
+q[t] - q[t-1], wrapping modulo 2^16 (positions) or 2^8 (visibility). The
+decoder takes a wrapping cumulative sum, so deltas are exact.
+
+Round-trip error: positions within +/-32767/S (about +/-4.0 for the default
+S = 8192) are recovered to within 0.5/S (about 6.1e-5); visibility to
+within 0.5/255 (about 0.002). Frames with no pose (all zeros) decode to
+exact zeros.
+"""
+import argparse
+import os
+import struct
+import zlib
+import numpy as np
+import pandas as pd
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b'SWKP'
+VERSION = 1
+HEADER = struct.Struct('<4sBBBBIHH')
+
+DEFAULT_SCALE = 8192
+NUM_LANDMARKS = 33
+
+FLAG_DELTA = 0x01
+COMPRESSION_SHIFT = 1
+COMPRESSION_CODES = {'none': 0, 'zlib': 1, 'zstd': 2}
+
+def error_bounds(scale=DEFAULT_SCALE):
+    """Maximum absolute round-trip error for positions and visibility."""
+    return {
+        'position': 0.5 / scale,
+        'visibility': 0.5 / 255,
+        'position_range': 32767 / scale
+    }
+
+def _compress(payload, compression):
+    if compression == 'zlib':
+        return zlib.compress(payload, 6)
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ImportError("zstd compression requires the 'zstandard' package")
+        return zstandard.ZstdCompressor(level=3).compress(payload)
+    return payload
+
+def _decompress(payload, compression, expected_size):
+    """Decompress at most expected_size + 1 bytes, so oversized streams stop early."""
+    if compression == 'zlib':
+        decompressor = zlib.decompressobj()
+        try:
+            data = decompressor.decompress(payload, expected_size + 1)
+        except zlib.error as e:
+            raise ValueError(f"Corrupt .swkp payload: {e}")
+        if not decompressor.eof and len(data) <= expected_size:
+            raise ValueError("Truncated .swkp payload")
+        return data
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ImportError("zstd compression requires the 'zstandard' package")
+        try:
+            # max_output_size=0 means unlimited, hence the + 1 for empty sequences
+            return zstandard.ZstdDecompressor().decompress(
+                payload, max_output_size=expected_size + 1)
+        except zstandard.ZstdError as e:
+            raise ValueError(f"Corrupt .swkp payload: {e}")
+    return payload
+
+def encode_keypoints(keypoints, compression='zlib', delta=True, scale=DEFAULT_SCALE):
+    """Encode a (T, L*4) or (T, L, 4) keypoint array into .swkp bytes."""
+    if compression not in COMPRESSION_CODES:
+        raise ValueError(f"Unknown compression: {compression}")
+
+    keypoints = np.asarray(keypoints, dtype=np.float32)
+    num_frames = keypoints.shape[0]
+    if keypoints.ndim == 2:
+        # Explicit landmark count so empty (T = 0) sequences reshape too
+        keypoints = keypoints.reshape(num_frames, keypoints.shape[1] // 4, 4)
+    num_landmarks = keypoints.shape[1]
+
+    positions = np.clip(np.rint(keypoints[:, :, :3] * scale), -32768, 32767).astype('<i2')
+    visibility = np.clip(np.rint(keypoints[:, :, 3] * 255), 0, 255).astype(np.uint8)
+
+    if delta and num_frames > 1:
+        # int16/uint8 subtraction wraps, which the decoder's cumsum undoes exactly
+        positions[1:] = positions[1:] - positions[:-1].copy()
+        visibility[1:] = visibility[1:] - visibility[:-1].copy()
+
+    flags = (FLAG_DELTA if delta else 0) | (COMPRESSION_CODES[compression] << COMPRESSION_SHIFT)
+    header = HEADER.pack(MAGIC, VERSION, flags, num_landmarks, 0, num_frames, scale, 0)
+    payload = positions.tobytes() + visibility.tobytes()
+    return header + _compress(payload, compression)
+
+def decode_keypoints(data, expected_landmarks=None):
+    """Decode .swkp bytes into a float32 (T, L*4) keypoint array.
+
+    With expected_landmarks set, streams with a different landmark count
+    are rejected before decompressing. Decompression stops once the size
+    implied by the header is exceeded, so a small upload cannot inflate
+    into a huge buffer.
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("Truncated .swkp header")
+    magic, version, flags, num_landmarks, _, num_frames, scale, _ = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a .swkp keypoint stream")
+    if version != VERSION:
+        raise ValueError(f"Unsupported .swkp version: {version}")
+    if expected_landmarks is not None and num_landmarks != expected_landmarks:
+        raise ValueError(f"Expected {expected_landmarks} landmarks, stream has {num_landmarks}")
+
+    codes = {code: name for name, code in COMPRESSION_CODES.items()}
+    compression = codes.get((flags >> COMPRESSION_SHIFT) & 0x03)
+    if compression is None:
+        raise ValueError("Unknown .swkp compression")
+
+    position_bytes = num_frames * num_landmarks * 3 * 2
+    expected_size = position_bytes + num_frames * num_landmarks
+    payload = _decompress(data[HEADER.size:], compression, expected_size)
+    if len(payload) < expected_size:
+        raise ValueError("Truncated .swkp payload")
+    if len(payload) > expected_size:
+        raise ValueError("Oversized .swkp payload")
+
+    positions = np.frombuffer(payload, dtype='<i2', count=num_frames * num_landmarks * 3)
+    positions = positions.reshape(num_frames, num_landmarks, 3)
+    visibility = np.frombuffer(payload, dtype=np.uint8, offset=position_bytes)
+    visibility = visibility.reshape(num_frames, num_landmarks)
+
+    if flags & FLAG_DELTA:
+        positions = np.cumsum(positions, axis=0, dtype=np.int16)
+        visibility = np.cumsum(visibility, axis=0, dtype=np.uint8)
+
+    keypoints = np.empty((num_frames, num_landmarks, 4), dtype=np.float32)
+    keypoints[:, :, :3] = positions / np.float32(scale)
+    keypoints[:, :, 3] = visibility / np.float32(255)
+    return keypoints.reshape(num_frames, num_landmarks * 4)
+
+def save_keypoints(path, keypoints, **kwargs):
+    """Write keypoints to a .swkp file."""
+    with open(path, 'wb') as f:
+        f.write(encode_keypoints(keypoints, **kwargs))
+
+def load_keypoints(path, expected_landmarks=None):
+    """Read keypoints from a .swkp file."""
+    with open(path, 'rb') as f:
+        return decode_keypoints(f.read(), expected_landmarks)
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert keypoint CSVs to the .swkp wire format')
+    parser.add_argument('csv_files', nargs='+', help='*_keypoints.csv files to encode')
+    parser.add_argument('--compression', choices=list(COMPRESSION_CODES), default='zlib')
+    parser.add_argument('--no-delta', action='store_true', help='Disable delta encoding')
+    args = parser.parse_args()
+
+    bounds = error_bounds()
+    for csv_file in args.csv_files:
+        keypoints = pd.read_csv(csv_file).values
+        output_file = csv_file.replace('.csv', '.swkp')
+        save_keypoints(output_file, keypoints,
+                       compression=args.compression, delta=not args.no_delta)
+
+        decoded = load_keypoints(output_file)
+        error = np.abs(decoded - keypoints).reshape(len(keypoints), -1, 4)
+        csv_size = os.path.getsize(csv_file)
+        swkp_size = os.path.getsize(output_file)
+        print(f"{os.path.basename(csv_file)}: {csv_size} -> {swkp_size} bytes "
+              f"({csv_size / swkp_size:.1f}x), "
+              f"max position error {error[:, :, :3].max():.2e} (bound {bounds['position']:.2e}), "
+              f"max visibility error {error[:, :, 3].max():.2e} (bound {bounds['visibility']:.2e})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import threading
+import time
+import cv2
+import numpy as np
+
+class CameraStream:
+    """Capture frames from one camera or video file on a background thread.
+
+    Before recording starts the thread keeps the latest frame for preview.
+    Once start_recording() is called, frames are decoded straight into a
+    preallocated buffer and stamped with their capture time. Video files are
+    not read until recording starts and are stamped from their own clock.
+    """
+
+    def __init__(self, source, max_frames):
+        self.source = source
+        self.is_file = isinstance(source, str)
+        self.max_frames = max_frames
+        self.cap = cv2.VideoCapture(source)
+
+        self.latest = None
+        self.frames = None
+        self.timestamps = np.zeros(max_frames)
+        self.count = 0
+
+        self.start_time = None
+        self.recording = threading.Event()
+        self.done = threading.Event()
+        self.stop_requested = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def start_recording(self, start_time):
+        """Begin recording; start_time is the shared time.monotonic() origin."""
+        self.start_time = start_time
+        self.recording.set()
+
+    def stop(self):
+        self.stop_requested.set()
+        self.recording.set()
+        self.thread.join()
+        self.cap.release()
+
+    def run(self):
+        # Two preview buffers so the main thread never shows a half-written frame
+        preview = [None, None]
+        preview_index = 0
+
+        if self.is_file:
+            self.recording.wait()
+
+        while not self.stop_requested.is_set() and self.count < self.max_frames:
+            recording = self.recording.is_set()
+            if not recording:
+                target = preview[preview_index]
+            elif self.frames is not None:
+                target = self.frames[self.count]
+            else:
+                target = None
+
+            ret, frame = self.cap.read(target)
+            captured_at = time.monotonic()
+            if not ret:
+                break
+
+            if not recording:
+                preview[preview_index] = frame
+                self.latest = frame
+                preview_index ^= 1
+                continue
+
+            if self.frames is None:
+                self.frames = np.empty((self.max_frames,) + frame.shape, dtype=frame.dtype)
+            if not np.may_share_memory(frame, self.frames[self.count]):
+                self.frames[self.count] = frame
+            self.latest = self.frames[self.count]
+
+            if self.is_file:
+                # Files replay at their own pace, so use the container timestamps
+                captured_at = self.start_time + self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            self.timestamps[self.count] = captured_at
+            self.count += 1
+
+        self.done.set()
+
+    def recorded(self):
+        """Recorded frames and their timestamps relative to the recording start."""
+        if self.frames is None:
+            return np.empty((0,)), np.empty((0,))
+        return self.frames[:self.count], self.timestamps[:self.count] - self.start_time
+
+def align_streams(timestamps, max_skew=0.02):
+    """Match frames across streams by nearest timestamp.
+
+    timestamps holds one sorted array per stream. The stream with the fewest
+    frames is the reference; for each of its frames the nearest frame of
+    every other stream is picked, and reference frames with any partner
+    further than max_skew seconds away are dropped.
+
+    Returns one index array per stream and the worst skew kept.
+    """
+    if any(len(t) == 0 for t in timestamps):
+        return [np.empty(0, dtype=int) for _ in timestamps], 0.0
+
+    ref = int(np.argmin([len(t) for t in timestamps]))
+    ref_times = timestamps[ref]
+
+    indices = []
+    skews = []
+    for times in timestamps:
+        # Nearest neighbour: compare the insertion point with its left neighbour
+        right = np.clip(np.searchsorted(times, ref_times), 1, len(times) - 1)
+        left = right - 1
+        nearest = np.where(np.abs(times[left] - ref_times) <= np.abs(times[right] - ref_times),
+                           left, right)
+        if len(times) == 1:
+            nearest = np.zeros(len(ref_times), dtype=int)
+        indices.append(nearest)
+        skews.append(np.abs(times[nearest] - ref_times))
+
+    skews = np.max(skews, axis=0)
+    keep = skews <= max_skew
+    return [idx[keep] for idx in indices], float(skews[keep].max()) if keep.any() else 0.0
@@ -0,0 +1,80 @@
+import numpy as np
+
+# Longest run of missed frames (~1/6 s at 30fps) that gets filled in
+MAX_GAP = 5
+
+def missing_frame_mask(keypoints):
+    """True for frames where pose detection found nothing (all-zero rows)."""
+    return ~np.any(np.asarray(keypoints) != 0, axis=1)
+
+def fill_pose_gaps(keypoints, max_gap=MAX_GAP, method='linear'):
+    """Fill short runs of missed frames in a (T, 33 * 4) keypoint sequence.
+
+    Interior gaps are filled only when they are at most max_gap frames
+    long. 'linear' interpolates between the valid frames on either side.
+    'velocity' is a constant-velocity tracker: it coasts x/y/z forward from
+    the last two valid frames and holds visibility, and it also coasts up
+    to max_gap frames into a trailing gap.
+
+    Returns the filled float32 sequence and a mask of frames still missing.
+    """
+    keypoints = np.array(keypoints, dtype=np.float32)
+    num_frames = len(keypoints)
+    missing = missing_frame_mask(keypoints)
+    if not missing.any() or missing.all():
+        return keypoints, missing
+
+    idx = np.arange(num_frames)
+    # Nearest valid frame at or before / at or after each frame (-1 / T if none)
+    prev_valid = np.maximum.accumulate(np.where(missing, -1, idx))
+    next_valid = np.minimum.accumulate(np.where(missing, num_frames, idx)[::-1])[::-1]
+
+    # Same notion of a short gap for both methods
+    short_interior = ((prev_valid >= 0) & (next_valid < num_frames)
+                      & (next_valid - prev_valid - 1 <= max_gap))
+
+    if method == 'linear':
+        fill = missing & short_interior
+        prev, nxt = prev_valid[fill], next_valid[fill]
+        weight = ((idx[fill] - prev) / (nxt - prev)).astype(np.float32)[:, np.newaxis]
+        keypoints[fill] = keypoints[prev] + weight * (keypoints[nxt] - keypoints[prev])
+    elif method == 'velocity':
+        trailing = (prev_valid >= 0) & (next_valid == num_frames) & (idx - prev_valid <= max_gap)
+        fill = missing & (short_interior | trailing)
+        prev = prev_valid[fill]
+
+        # Valid frame before prev_valid gives the velocity (zero if there is none)
+        valid_idx = np.flatnonzero(~missing)
+        rank = np.searchsorted(valid_idx, prev)
+        prev2 = valid_idx[np.maximum(rank - 1, 0)]
+        span = np.maximum(prev - prev2, 1).astype(np.float32)[:, np.newaxis]
+        velocity = (keypoints[prev] - keypoints[prev2]) / span
+
+        coasted = keypoints[prev] + velocity * (idx[fill] - prev).astype(np.float32)[:, np.newaxis]
+        # Hold visibility rather than extrapolating it
+        coasted[:, 3::4] = keypoints[prev][:, 3::4]
+        keypoints[fill] = coasted
+    else:
+        raise ValueError(f"Unknown gap fill method: {method}")
+
+    return keypoints, missing & ~fill
+
+def normalize_sequence_length(keypoints, target_length=60):
+    """Normalize a keypoint sequence to a fixed number of frames."""
+    if len(keypoints) > target_length:
+        # Take frames focusing on the critical part of the swing
+        start_idx = max(0, len(keypoints) // 2 - target_length // 2)
+        return keypoints[start_idx:start_idx + target_length]
+    else:
+        # Pad with zero frames, which the models' Masking layer skips
+        padding = np.zeros((target_length - len(keypoints), keypoints.shape[1]))
+        return np.vstack([keypoints, padding])
+
+def prepare_sequence(keypoints, target_length=60, max_gap=MAX_GAP, method='linear'):
+    """Fill short detection gaps and normalize length for the LSTM models.
+
+    Frames that are still missing (long gaps) and padding stay all-zero so
+    Masking(mask_value=0.0) drops them from the LSTM.
+    """
+    keypoints, _ = fill_pose_gaps(keypoints, max_gap=max_gap, method=method)
+    return normalize_sequence_length(keypoints, target_length)
@@ -3,6 +3,7 @@ import numpy as np
 import cv2
 import mediapipe as mp
 from data_collector import extract_keypoints
+from pose_postprocessing import prepare_sequence
 
 # Load model
 interpreter = tf.lite.Interpreter(model_path="models/swing_error_detector.tflite")
@@ -20,13 +21,8 @@ def analyze_swing(video_path):
     # Extract keypoints
     frames, keypoints = extract_keypoints(video_path, 'temp')
     
-    # Normalize data as in training
-    if len(keypoints) > 60:
-        start_idx = max(0, len(keypoints) // 2 - 30)
-        keypoints = keypoints[start_idx:start_idx + 60]
-    else:
-        padding = np.zeros((60 - len(keypoints), len(keypoints[0])))
-        keypoints = np.vstack([keypoints, padding])
+    # Fill short detection gaps and normalize length as in training
+    keypoints = prepare_sequence(keypoints)
     
     # Run inference
     keypoints = np.array([keypoints], dtype=np.float32)
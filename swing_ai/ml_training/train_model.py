@@ -1,7 +1,14 @@
+import argparse
 import tensorflow as tf
 import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
+from training_telemetry import TrainingTelemetry
+
+parser = argparse.ArgumentParser(description='Train the swing error detector')
+parser.add_argument('--profile-steps', type=int, nargs=2, metavar=('START', 'STOP'),
+                    help='Capture a TensorBoard profiler trace for this global step range')
+args = parser.parse_args()
 
 # Load dataset
 dataset = pd.read_pickle('data/swing_dataset.csv')
@@ -16,7 +23,9 @@ X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_
 
 # Define model
 model = tf.keras.Sequential([
-    tf.keras.layers.LSTM(64, input_shape=(X_train.shape[1], X_train.shape[2]), return_sequences=True),
+    # Skip all-zero frames (padding and undetected poses)
+    tf.keras.layers.Masking(mask_value=0.0, input_shape=(X_train.shape[1], X_train.shape[2])),
+    tf.keras.layers.LSTM(64, return_sequences=True),
     tf.keras.layers.Dropout(0.2),
     tf.keras.layers.LSTM(32),
     tf.keras.layers.Dense(16, activation='relu'),
@@ -38,7 +47,8 @@ history = model.fit(
     validation_data=(X_test, y_test),
     callbacks=[
         tf.keras.callbacks.EarlyStopping(patience=5, restore_best_weights=True),
-        tf.keras.callbacks.ModelCheckpoint('models/best_model.h5', save_best_only=True)
+        tf.keras.callbacks.ModelCheckpoint('models/best_model.h5', save_best_only=True),
+        TrainingTelemetry(batch_size=16, num_samples=len(X_train), profile_steps=args.profile_steps)
     ]
 )
 
@@ -0,0 +1,129 @@
+import json
+import os
+import time
+import numpy as np
+import tensorflow as tf
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+TELEMETRY_LOG = 'logs/training_telemetry.jsonl'
+PROFILE_DIR = 'logs/profile'
+
+class TrainingTelemetry(tf.keras.callbacks.Callback):
+    """Log per-epoch training throughput, step timing and memory as JSON lines.
+
+    step_seconds is measured from batch begin to batch end and includes
+    fetching the batch, since model.fit pulls input inside the traced train
+    step. between_step_seconds is the gap from one step ending to the next
+    beginning (callbacks and other Python overhead), not input wait. To split
+    input time from compute, use profile_steps to capture a TensorBoard trace
+    and read its input-pipeline analysis.
+    """
+
+    def __init__(self, batch_size, num_samples=None, log_file=TELEMETRY_LOG,
+                 profile_steps=None, profile_dir=PROFILE_DIR):
+        super().__init__()
+        self.batch_size = batch_size
+        self.num_samples = num_samples
+        self.log_file = log_file
+        # Optional (start, stop) global step range for a TensorBoard profiler trace
+        self.profile_steps = profile_steps
+        self.profile_dir = profile_dir
+        self.profiling = False
+        self.global_step = 0
+
+    def on_train_begin(self, logs=None):
+        os.makedirs(os.path.dirname(self.log_file) or '.', exist_ok=True)
+        self.global_step = 0
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.step_times = []
+        self.between_steps = []
+        self.epoch_start = time.perf_counter()
+        self.last_batch_end = self.epoch_start
+        self.cpu_start = os.times()
+        if tf.config.list_physical_devices('GPU'):
+            tf.config.experimental.reset_memory_stats('GPU:0')
+
+    def on_train_batch_begin(self, batch, logs=None):
+        if self.profile_steps and self.global_step == self.profile_steps[0]:
+            tf.profiler.experimental.start(self.profile_dir)
+            self.profiling = True
+
+        self.batch_start = time.perf_counter()
+        self.between_steps.append(self.batch_start - self.last_batch_end)
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.last_batch_end = time.perf_counter()
+        self.step_times.append(self.last_batch_end - self.batch_start)
+        self.global_step += 1
+
+        if self.profiling and self.global_step >= self.profile_steps[1]:
+            self.stop_profiler()
+
+    def on_epoch_end(self, epoch, logs=None):
+        now = time.perf_counter()
+        train_seconds = self.last_batch_end - self.epoch_start
+        cpu_end = os.times()
+        cpu_seconds = ((cpu_end.user - self.cpu_start.user)
+                       + (cpu_end.system - self.cpu_start.system))
+
+        steps = len(self.step_times)
+        samples = steps * self.batch_size
+        if self.num_samples is not None:
+            samples = min(samples, self.num_samples)
+        step_ms = np.array(self.step_times) * 1000
+        step_seconds = float(np.sum(self.step_times))
+        between_seconds = float(np.sum(self.between_steps))
+
+        record = {
+            'epoch': epoch,
+            'steps': steps,
+            'samples': samples,
+            'train_seconds': train_seconds,
+            'validation_seconds': now - self.last_batch_end,
+            'samples_per_sec': samples / train_seconds if train_seconds > 0 else 0.0,
+            'step_time_ms_p50': float(np.percentile(step_ms, 50)) if steps else None,
+            'step_time_ms_p90': float(np.percentile(step_ms, 90)) if steps else None,
+            'step_time_ms_p99': float(np.percentile(step_ms, 99)) if steps else None,
+            'step_seconds': step_seconds,
+            'between_step_seconds': between_seconds,
+            'between_step_fraction': between_seconds / train_seconds if train_seconds > 0 else 0.0,
+            # Average busy cores over the epoch, against the configured thread pools
+            'cpu_utilization': cpu_seconds / (now - self.epoch_start),
+            'cpu_count': os.cpu_count(),
+            'inter_op_threads': tf.config.threading.get_inter_op_parallelism_threads(),
+            'intra_op_threads': tf.config.threading.get_intra_op_parallelism_threads(),
+            'peak_memory_mb': self.peak_memory_mb(),
+            'metrics': {name: float(value) for name, value in (logs or {}).items()}
+        }
+
+        with open(self.log_file, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+        print(f"\n[telemetry] epoch {epoch}: {record['samples_per_sec']:.1f} samples/sec, "
+              f"step p50 {record['step_time_ms_p50'] or 0:.1f}ms "
+              f"p99 {record['step_time_ms_p99'] or 0:.1f}ms, "
+              f"between steps {record['between_step_fraction']:.1%}, "
+              f"cpu {record['cpu_utilization']:.1f} cores")
+
+    def on_train_end(self, logs=None):
+        if self.profiling:
+            self.stop_profiler()
+
+    def stop_profiler(self):
+        tf.profiler.experimental.stop()
+        self.profiling = False
+        print(f"\n[telemetry] profiler trace written to {self.profile_dir}")
+
+    def peak_memory_mb(self):
+        """Peak GPU memory this epoch if a GPU is used, else process peak RSS."""
+        if tf.config.list_physical_devices('GPU'):
+            return tf.config.experimental.get_memory_info('GPU:0')['peak'] / 2**20
+        if resource is not None:
+            # ru_maxrss is in kilobytes on Linux
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return None